@@ -3,10 +3,19 @@
 and implements commonly used methods, such as gradient methods,
 Newton's method, and the augmented Lagrangian method.
 """
+import contextlib
+import math
+
+import numba as nb
 import numpy as np
+import scipy.sparse
 
 import sigpy as sp
-from sigpy import backend, util
+from sigpy import backend, config, util
+
+if config.cupy_enabled:
+    import cupy as cp
+    import cupyx.scipy.sparse
 
 
 class Alg(object):
@@ -39,20 +48,29 @@ class Alg(object):
 
     Args:
         max_iter (int): Maximum number of iterations.
+        check_every (int): Number of iterations between stopping condition
+            checks that read device scalars back to the host.
 
     Attributes:
         max_iter (int): Maximum number of iterations.
+        check_every (int): Number of iterations between stopping condition
+            checks that read device scalars back to the host.
         iter (int): Current iteration.
 
     """
 
-    def __init__(self, max_iter):
+    def __init__(self, max_iter, check_every=1):
         self.max_iter = max_iter
+        self.check_every = check_every
         self.iter = 0
 
     def _update(self):
         raise NotImplementedError
 
+    def _check(self):
+        """Return whether to evaluate device-side stopping conditions."""
+        return self.iter % self.check_every == 0
+
     def _done(self):
         return self.iter >= self.max_iter
 
@@ -75,21 +93,34 @@ class Alg(object):
 class PowerMethod(Alg):
     """Power method to estimate maximum eigenvalue and eigenvector.
 
+    When `batched` is True, the leading axis of `x` indexes independent
+    problems, and `A` must act on each of them separately.
+    All problems are then iterated in lockstep with a single call to `A`
+    per iteration, and `max_eig` holds one eigenvalue per problem.
+
     Args:
         A (Linop or function): Function to a hermitian linear mapping.
         x (array): Variable to optimize over.
+        norm_func (function or None): Function to compute the norm
+            used for normalization.
         max_iter (int): Maximum number of iterations.
+        batched (bool): Toggle batched estimation over the leading axis.
 
     Attributes:
-        max_eig (float): Maximum eigenvalue of `A`.
+        max_eig (scalar or array): Maximum eigenvalue of `A`,
+            kept on the same device as `x`.
 
     """
 
-    def __init__(self, A, x, norm_func=None, max_iter=30):
+    def __init__(self, A, x, norm_func=None, max_iter=30, batched=False):
+        if batched and norm_func is not None:
+            raise ValueError("Cannot specify norm_func when batched is True.")
+
         self.A = A
         self.x = x
-        self.max_eig = np.infty
+        self.max_eig = np.inf
         self.norm_func = norm_func
+        self.batched = batched
         super().__init__(max_iter)
 
     def _update(self):
@@ -97,12 +128,21 @@ class PowerMethod(Alg):
         device = backend.get_device(y)
         xp = device.xp
         with device:
-            if self.norm_func is None:
-                self.max_eig = xp.linalg.norm(y).item()
+            if self.batched:
+                self.max_eig = xp.linalg.norm(y.reshape(len(y), -1), axis=1)
+                max_eig = self.max_eig.reshape((-1,) + (1,) * (y.ndim - 1))
+            elif self.norm_func is None:
+                # vdot maps to a single BLAS call and stays on device.
+                self.max_eig = xp.real(xp.vdot(y, y)) ** 0.5
+                max_eig = self.max_eig
             else:
                 self.max_eig = self.norm_func(y)
+                max_eig = self.max_eig
 
-            backend.copyto(self.x, y / self.max_eig)
+            if backend.get_device(self.x) == device:
+                xp.multiply(y, 1 / max_eig, out=self.x)
+            else:
+                backend.copyto(self.x, y / max_eig)
 
     def _done(self):
         return self.iter >= self.max_iter
@@ -133,6 +173,12 @@ class GradientMethod(Alg):
     Nesterov's acceleration is supported by toggling the `accelerate`
     input option.
 
+    On CPU, setting `block_size` processes the gradient step, proximal step
+    and residual reduction in blocks of `block_size` elements, so that each
+    block is reused while it is still in cache. This requires proxg to be
+    separable, and to accept arbitrary one-dimensional slices of x,
+    such as a function wrapping :func:`sigpy.thresh.soft_thresh`.
+
     Args:
         gradf (function): function to compute :math:`\nabla f`.
         x (array): variable to optimize over.
@@ -143,6 +189,10 @@ class GradientMethod(Alg):
         accelerate (bool): toggle Nesterov acceleration.
         max_iter (int): maximum number of iterations.
         tol (float): Tolerance for stopping condition.
+        check_every (int): Number of iterations between tolerance checks.
+        block_size (int or None): number of elements per cache block
+            on CPU when proxg is specified.
+            If None, x is processed in one block.
 
     References:
         Nesterov, Y. E. (1983).
@@ -166,6 +216,8 @@ class GradientMethod(Alg):
         accelerate=False,
         max_iter=100,
         tol=0,
+        check_every=1,
+        block_size=None,
     ):
         self.gradf = gradf
         self.alpha = alpha
@@ -175,38 +227,104 @@ class GradientMethod(Alg):
         self.tol = tol
 
         self.device = backend.get_device(x)
+        if self.device != backend.cpu_device:
+            block_size = None
+        elif block_size is not None and not x.flags.c_contiguous:
+            raise ValueError("block_size requires x to be C-contiguous.")
+
+        self.block_size = block_size
         with self.device:
             if self.accelerate:
                 self.z = self.x.copy()
                 self.t = 1
 
-        self.resid = np.infty
-        super().__init__(max_iter)
+            if self.proxg is not None:
+                self.x_old = self.device.xp.empty_like(self.x)
 
-    def _update(self):
+            self.resid = self.device.xp.array(np.inf, dtype=x.real.dtype)
+
+        # Bind the update specialized for this configuration,
+        # so each iteration runs straight-line code.
+        self._update = {
+            (False, False): self._update_plain,
+            (True, False): self._update_accel,
+            (False, True): self._update_prox,
+            (True, True): self._update_accel_prox,
+        }[(bool(self.accelerate), self.proxg is not None)]
+
+        super().__init__(max_iter, check_every=check_every)
+
+    def _update_plain(self):
         xp = self.device.xp
         with self.device:
-            x_old = self.x.copy()
+            gradf_x = self.gradf(self.x)
+            util.axpy(self.x, -self.alpha, gradf_x)
+            # x - x_old is -alpha * gradf_x, so x_old is not needed.
+            self.resid = xp.real(xp.vdot(gradf_x, gradf_x)) ** 0.5
+
+    def _update_accel(self):
+        with self.device:
+            t_old = self.t
+            self.t = _fista_t(t_old)
+            coef = (t_old - 1) / self.t
 
-            if self.accelerate:
-                backend.copyto(self.x, self.z)
+            # Gradient step and extrapolation in one pass.
+            sqres = util._nesterov_step(
+                self.x, self.z, self.gradf(self.z), self.alpha, coef
+            )
+            self.resid = sqres**0.5 / self.alpha
 
-            # Perform update
-            util.axpy(self.x, -self.alpha, self.gradf(self.x))
-            if self.proxg is not None:
-                backend.copyto(self.x, self.proxg(self.alpha, self.x))
+    def _update_prox(self):
+        with self.device:
 
-            if self.accelerate:
-                t_old = self.t
-                self.t = (1 + (1 + 4 * t_old**2) ** 0.5) / 2
-                backend.copyto(
-                    self.z, self.x + ((t_old - 1) / self.t) * (self.x - x_old)
-                )
+            def finish(x, x_old, src):
+                return util._diff_sqnorm(x, x_old)
 
-            self.resid = xp.linalg.norm(self.x - x_old).item() / self.alpha
+            sqres = self._prox_step(self.x, finish)
+            self.resid = sqres**0.5 / self.alpha
+
+    def _update_accel_prox(self):
+        with self.device:
+            t_old = self.t
+            self.t = _fista_t(t_old)
+            coef = (t_old - 1) / self.t
+
+            def finish(x, x_old, z):
+                return util._extrapolate(z, x, x_old, coef)
+
+            sqres = self._prox_step(self.z, finish)
+            self.resid = sqres**0.5 / self.alpha
+
+    def _prox_step(self, src, finish):
+        """Perform the gradient and proximal steps from src.
+
+        finish(x, x_old, src) is then called to complete the update
+        and return the squared residual.
+        When block_size is set, all three steps are applied block by block.
+        """
+        arrays = [self.x, self.x_old, src, self.gradf(src)]
+        if self.block_size is None:
+            blocks = [arrays]
+        else:
+            arrays = [a.reshape(-1) for a in arrays]
+            blocks = [
+                [a[i : i + self.block_size] for a in arrays]
+                for i in range(0, self.x.size, self.block_size)
+            ]
+
+        sqres = 0
+        for x_b, x_old_b, src_b, g_b in blocks:
+            # Save x to x_old and take the gradient step in one pass.
+            util._gradient_step(x_b, x_old_b, src_b, g_b, self.alpha)
+            backend.copyto(x_b, self.proxg(self.alpha, x_b))
+            sqres += finish(x_b, x_old_b, src_b)
+
+        return sqres
 
     def _done(self):
-        return (self.iter >= self.max_iter) or self.resid <= self.tol
+        return self.iter >= self.max_iter or (
+            self._check() and self.resid <= self.tol
+        )
 
 
 class ConjugateGradient(Alg):
@@ -218,17 +336,82 @@ class ConjugateGradient(Alg):
 
     where A is a Hermitian linear operator.
 
+    A can also be a scipy or cupyx sparse matrix, in which case
+    it is applied with the native sparse matrix-vector product,
+    and P can be set to "jacobi" to precondition with
+    the inverse of its diagonal.
+
+    Setting `matvec_dtype` to a lower precision applies A to the search
+    direction in that precision to reduce memory traffic, while the initial
+    residual, inner products and updates stay in the precision of x.
+    This works best when A is well-conditioned or paired with
+    a preconditioner. A Linop or function A is only given the search
+    direction in `matvec_dtype`, such as float16 for float32 variables,
+    and must itself compute in that precision for memory traffic to be
+    reduced. A sparse matrix A is cast to `matvec_dtype` once. As sparse
+    matrices do not support float16, `matvec_dtype` must then be one of
+    float32, float64, complex64 or complex128, for example float32 for
+    float64 variables.
+
     Args:
-        A (Linop or function): Linop or function to compute A.
+        A (Linop, function or sparse matrix): Linop or function to compute A.
         b (array): Observation.
         x (array): Variable.
-        P (function or None): Preconditioner.
+        P (function, "jacobi" or None): Preconditioner.
         max_iter (int): Maximum number of iterations.
         tol (float): Tolerance for stopping condition.
+        check_every (int): Number of iterations between tolerance checks.
+        matvec_dtype (Dtype or None): Data type to apply A in.
+            If None, A is applied in the data type of x.
+        x0_is_zero (bool or None): Whether x is initially zero, in which
+            case the initial evaluation of A(x) is skipped.
+            If None, this is detected from x.
 
     """
 
-    def __init__(self, A, b, x, P=None, max_iter=100, tol=0):
+    def __init__(
+        self,
+        A,
+        b,
+        x,
+        P=None,
+        max_iter=100,
+        tol=0,
+        check_every=1,
+        matvec_dtype=None,
+        x0_is_zero=None,
+    ):
+        if isinstance(P, str):
+            if P != "jacobi" or not _is_sparse_matrix(A):
+                raise ValueError(
+                    "P can only be a string when it is 'jacobi' "
+                    "and A is a sparse matrix, got {}.".format(P)
+                )
+
+            with backend.get_device(x):
+                inv_diag = (1 / A.diagonal()).reshape(
+                    x.shape[:1] + (1,) * (x.ndim - 1)
+                )
+
+            def P(r):
+                return inv_diag * r
+
+        A_matvec = None
+        if _is_sparse_matrix(A):
+            if matvec_dtype is not None:
+                if np.dtype(matvec_dtype) not in _SPARSE_DTYPES:
+                    raise ValueError(
+                        "matvec_dtype must be one of {} for sparse A, "
+                        "got {}.".format(
+                            [d.name for d in _SPARSE_DTYPES],
+                            np.dtype(matvec_dtype),
+                        )
+                    )
+
+                A_matvec = A.astype(matvec_dtype).dot
+
+            A = A.dot
+
         self.A = A
         self.b = b
         self.P = P
@@ -236,8 +419,13 @@ class ConjugateGradient(Alg):
         self.tol = tol
         self.device = backend.get_device(x)
         with self.device:
-            xp = self.device.xp
-            self.r = b - self.A(self.x)
+            if x0_is_zero is None:
+                x0_is_zero = not self.x.any()
+
+            if x0_is_zero:
+                self.r = b.copy()
+            else:
+                self.r = b - self.A(self.x)
 
             if self.P is None:
                 z = self.r
@@ -250,43 +438,134 @@ class ConjugateGradient(Alg):
                 self.p = z
 
             self.not_positive_definite = False
-            self.rzold = xp.real(xp.vdot(self.r, z))
-            self.resid = self.rzold.item() ** 0.5
+            self.rzold = util._real_vdot(self.r, z)
 
-        super().__init__(max_iter)
+        # Bind the preconditioning step once, so the update is branch-free.
+        # It maps r and <r, r> to z = P(r) and <r, z>.
+        if self.P is None:
+
+            def precond(r, rr):
+                return r, rr
+
+        else:
+
+            def precond(r, rr):
+                z = self.P(r)
+                return z, util._real_vdot(r, z)
+
+        self._precond = precond
+
+        if matvec_dtype is None:
+            matvec = self.A
+        else:
+            if A_matvec is None:
+                A_matvec = self.A
+
+            def matvec(p):
+                return A_matvec(p.astype(matvec_dtype)).astype(p.dtype)
+
+        self._matvec = matvec
+
+        super().__init__(max_iter, check_every=check_every)
 
     def _update(self):
         with self.device:
-            xp = self.device.xp
-            Ap = self.A(self.p)
-            pAp = xp.real(xp.vdot(self.p, Ap)).item()
+            Ap = self._matvec(self.p)
+            pAp = util._real_vdot(self.p, Ap).item()
             if pAp <= 0:
                 self.not_positive_definite = True
                 return
 
             self.alpha = self.rzold / pAp
-            util.axpy(self.x, self.alpha, self.p)
             if self.iter < self.max_iter - 1:
-                util.axpy(self.r, -self.alpha, Ap)
-                if self.P is not None:
-                    z = self.P(self.r)
-                else:
-                    z = self.r
-
-                rznew = xp.real(xp.vdot(self.r, z))
+                # Update x and r, and reduce <r, r>, in one pass.
+                rrnew = util._cg_step(self.x, self.r, self.p, Ap, self.alpha)
+                z, rznew = self._precond(self.r, rrnew)
                 beta = rznew / self.rzold
-                util.xpay(self.p, beta, z)
+                util._cg_direction(self.p, beta, z)
                 self.rzold = rznew
+            else:
+                util.axpy(self.x, self.alpha, self.p)
 
-            self.resid = self.rzold.item() ** 0.5
+    @property
+    def resid(self):
+        """scalar: Residual norm, only evaluated when accessed."""
+        return self.rzold**0.5
 
     def _done(self):
+        # Compare squared quantities to avoid a square root per iteration.
         return (
             self.iter >= self.max_iter
             or self.not_positive_definite
-            or self.resid <= self.tol
+            or (self._check() and self.rzold <= self.tol * self.tol)
         )
 
+    @classmethod
+    def run_batch(cls, As, bs, xs, Ps=None, max_iter=100, tol=0):
+        """Solve several independent systems concurrently.
+
+        On GPU, each system is run on its own non-blocking CUDA stream,
+        so that kernels from small problems can overlap.
+        Each update still reads <p, Ap> back to the host to check
+        positive definiteness, which synchronizes that system's stream,
+        so the overlap is limited to work queued between these reads.
+        On CPU, the systems are updated in turn.
+
+        Args:
+            As (list of Linop or function): Linops or functions to compute A.
+            bs (list of arrays): Observations.
+            xs (list of arrays): Variables, updated in place.
+            Ps (list of function or None): Preconditioners.
+            max_iter (int): Maximum number of iterations.
+            tol (float): Tolerance for stopping condition.
+
+        Returns:
+            list of ConjugateGradient: Finished algorithm objects.
+
+        """
+        if Ps is None:
+            Ps = [None] * len(bs)
+
+        if not len(As) == len(bs) == len(xs) == len(Ps):
+            raise ValueError(
+                "As, bs, xs and Ps must have the same length, got {}.".format(
+                    [len(As), len(bs), len(xs), len(Ps)]
+                )
+            )
+
+        streams = []
+        for x in xs:
+            device = backend.get_device(x)
+            if device == backend.cpu_device:
+                streams.append(contextlib.nullcontext())
+            else:  # pragma: no cover
+                with device:
+                    streams.append(cp.cuda.Stream(non_blocking=True))
+
+        algs = []
+        for A, b, x, P, stream in zip(As, bs, xs, Ps, streams):
+            with stream:
+                algs.append(cls(A, b, x, P=P, max_iter=max_iter, tol=tol))
+
+        # Check stopping conditions on each system's own stream,
+        # as its residual is written there.
+        active = list(zip(algs, streams))
+        while active:
+            remaining = []
+            for alg, stream in active:
+                with stream:
+                    if not alg.done():
+                        alg.update()
+                        remaining.append((alg, stream))
+
+            active = remaining
+
+        for stream in streams:
+            if not isinstance(stream, contextlib.nullcontext):
+                stream.synchronize()  # pragma: no cover
+
+        return algs
+
 
 class PrimalDualHybridGradient(Alg):
     r"""Primal dual hybrid gradient.
@@ -314,6 +593,13 @@ class PrimalDualHybridGradient(Alg):
         gamma_dual (float): Strong convexity parameter of f^*.
         max_iter (int): Maximum number of iterations.
         tol (float): Tolerance for stopping condition.
+        check_every (int): Number of iterations between tolerance checks.
+        batch_axis (None or int): Axis of x and u indexing independent
+            problems, such as image slices. If specified, A, AH, proxfc
+            and proxg must operate on the whole batch, and array-valued
+            step-sizes must broadcast against x and u. All problems are
+            then updated together, and the stopping condition applies
+            to the batch as a whole.
 
     References:
        Chambolle, A., & Pock, T. (2011).
@@ -338,7 +624,12 @@ class PrimalDualHybridGradient(Alg):
         gamma_dual=0,
         max_iter=100,
         tol=0,
+        check_every=1,
+        batch_axis=None,
     ):
+        if batch_axis is not None:
+            _check_batch_shapes(x, u, tau, sigma, batch_axis)
+
         self.proxfc = proxfc
         self.proxg = proxg
         self.tol = tol
@@ -360,6 +651,8 @@ class PrimalDualHybridGradient(Alg):
 
         with self.x_device:
             self.x_ext = self.x.copy()
+            self.x_old = self.x_device.xp.empty_like(self.x)
+            self.resid = self.x_device.xp.array(np.inf, dtype=x.real.dtype)
 
         if self.gamma_primal > 0:
             xp = self.x_device.xp
@@ -371,9 +664,7 @@ class PrimalDualHybridGradient(Alg):
             with self.u_device:
                 self.sigma_min = xp.amin(xp.abs(sigma)).item()
 
-        self.resid = np.infty
-
-        super().__init__(max_iter)
+        super().__init__(max_iter, check_every=check_every)
 
     def _update(self):
         # Update dual.
@@ -382,15 +673,15 @@ class PrimalDualHybridGradient(Alg):
 
         # Update primal.
         with self.x_device:
-            x_old = self.x.copy()
-            util.axpy(self.x, -self.tau, self.AH(self.u))
+            util._gradient_step(
+                self.x, self.x_old, self.x, self.AH(self.u), self.tau
+            )
             backend.copyto(self.x, self.proxg(self.tau, self.x))
 
         # Update step-size if neccessary.
         if self.gamma_primal > 0 and self.gamma_dual == 0:
             with self.x_device:
-                xp = self.x_device.xp
-                theta = 1 / (1 + 2 * self.gamma_primal * self.tau_min) ** 0.5
+                theta = _pdhg_theta(self.gamma_primal, self.tau_min)
                 self.tau *= theta
                 self.tau_min *= theta
 
@@ -398,8 +689,7 @@ class PrimalDualHybridGradient(Alg):
                 self.sigma /= theta
         elif self.gamma_primal == 0 and self.gamma_dual > 0:
             with self.u_device:
-                xp = self.u_device.xp
-                theta = 1 / (1 + 2 * self.gamma_dual * self.sigma_min) ** 0.5
+                theta = _pdhg_theta(self.gamma_dual, self.sigma_min)
                 self.sigma *= theta
                 self.sigma_min *= theta
 
@@ -410,13 +700,21 @@ class PrimalDualHybridGradient(Alg):
 
         # Extrapolate primal.
         with self.x_device:
-            xp = self.x_device.xp
-            x_diff = self.x - x_old
-            self.resid = xp.linalg.norm(x_diff / self.tau**0.5).item()
-            backend.copyto(self.x_ext, self.x + theta * x_diff)
+            if util._is_scalar(self.tau):
+                sqres = util._extrapolate(
+                    self.x_ext, self.x, self.x_old, theta
+                )
+                self.resid = (sqres / self.tau) ** 0.5
+            else:
+                sqres = util._extrapolate(
+                    self.x_ext, self.x, self.x_old, theta, scale=self.tau
+                )
+                self.resid = sqres**0.5
 
     def _done(self):
-        return (self.iter >= self.max_iter) or (self.resid <= self.tol)
+        return self.iter >= self.max_iter or (
+            self._check() and self.resid <= self.tol
+        )
 
 
 class AltMin(Alg):
@@ -490,7 +788,7 @@ class AugmentedLagrangianMethod(Alg):
             xp = device.xp
             with device:
                 util.axpy(self.u, self.mu, self.g(self.x))
-                backend.copyto(self.u, xp.clip(self.u, 0, np.infty))
+                backend.copyto(self.u, xp.clip(self.u, 0, np.inf))
 
         if self.h is not None:
             util.axpy(self.v, self.mu, self.h(self.x))
@@ -788,24 +1086,42 @@ class NewtonsMethod(Alg):
              for backtracking line-search.
         max_iter (int): maximum number of iterations.
         tol (float): Tolerance for stopping condition.
+        grad_hess (None or function): A function x -> (gradient of f at x,
+            inverse Hessian of f at x). If specified, it is used in place
+            of gradf and inv_hessf, so that intermediate results, such as
+            a forward model evaluation, can be shared between the two.
 
     """
 
     def __init__(
-        self, gradf, inv_hessf, x, beta=1, f=None, max_iter=10, tol=0
+        self,
+        gradf,
+        inv_hessf,
+        x,
+        beta=1,
+        f=None,
+        max_iter=10,
+        tol=0,
+        grad_hess=None,
     ):
         if beta < 1 and f is None:
             raise TypeError(
                 "Cannot do backtracking linesearch without specifying f."
             )
 
+        if grad_hess is None and (gradf is None or inv_hessf is None):
+            raise TypeError(
+                "Must specify either gradf and inv_hessf, or grad_hess."
+            )
+
         self.gradf = gradf
         self.inv_hessf = inv_hessf
+        self.grad_hess = grad_hess
         self.x = x
-        self.lamda = np.infty
+        self.lamda = np.inf
         self.beta = beta
         self.f = f
-        self.residual = np.infty
+        self.residual = np.inf
         self.tol = tol
 
         super().__init__(max_iter)
@@ -814,8 +1130,13 @@ class NewtonsMethod(Alg):
         device = backend.get_device(self.x)
         xp = device.xp
         with device:
-            gradf_x = self.gradf(self.x)
-            p = -self.inv_hessf(self.x)(gradf_x)
+            if self.grad_hess is None:
+                gradf_x = self.gradf(self.x)
+                inv_hessf_x = self.inv_hessf(self.x)
+            else:
+                gradf_x, inv_hessf_x = self.grad_hess(self.x)
+
+            p = -inv_hessf_x(gradf_x)
             self.lamda2 = -xp.real(xp.vdot(p, gradf_x)).item()
             if self.lamda2 < 0:
                 raise ValueError(
@@ -834,7 +1155,7 @@ class NewtonsMethod(Alg):
                     x_new = self.x + alpha * p
 
             backend.copyto(self.x, x_new)
-            self.residual = self.lamda2**0.5
+            self.residual = math.sqrt(self.lamda2)
 
     def _done(self):
         return self.iter >= self.max_iter or self.residual <= self.tol
@@ -864,7 +1185,7 @@ class GerchbergSaxton(Alg):
         self.tol = tol
         self.max_tol = max_tol
         self.lamb = lamb
-        self.residual = np.infty
+        self.residual = np.inf
 
     def _update(self):
         device = backend.get_device(self.y)
@@ -891,3 +1212,49 @@ class GerchbergSaxton(Alg):
         over_iter = self.iter >= self.max_iter
         under_tol = self.residual <= self.tol
         return over_iter or under_tol
+
+
+# Data types supported by both scipy and cupyx sparse matrices.
+_SPARSE_DTYPES = [
+    np.dtype(d) for d in [np.float32, np.float64, np.complex64, np.complex128]
+]
+
+
+def _is_sparse_matrix(A):
+    if scipy.sparse.issparse(A):
+        return True
+
+    return config.cupy_enabled and cupyx.scipy.sparse.issparse(A)
+
+
+def _check_batch_shapes(x, u, tau, sigma, batch_axis):
+    if x.shape[batch_axis] != u.shape[batch_axis]:
+        raise ValueError(
+            "x and u must have the same batch size, got {} and {}.".format(
+                x.shape[batch_axis], u.shape[batch_axis]
+            )
+        )
+
+    steps = [("tau", tau, x.shape), ("sigma", sigma, u.shape)]
+    for name, step, shape in steps:
+        try:
+            valid = np.broadcast_shapes(np.shape(step), shape) == shape
+        except ValueError:
+            valid = False
+
+        if not valid:
+            raise ValueError(
+                "{} with shape {} cannot broadcast to {}.".format(
+                    name, np.shape(step), shape
+                )
+            )
+
+
+@nb.jit(nopython=True, cache=True)  # pragma: no cover
+def _fista_t(t_old):
+    return 0.5 * (1 + math.sqrt(1 + 4 * t_old * t_old))
+
+
+@nb.jit(nopython=True, cache=True)  # pragma: no cover
+def _pdhg_theta(gamma, step_min):
+    return 1 / math.sqrt(1 + 2 * gamma * step_min)
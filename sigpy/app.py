@@ -40,19 +40,38 @@ class App(object):
         alg (Alg): Alg object.
         show_pbar (bool): toggle whether show progress bar.
         leave_pbar (bool): toggle whether to leave progress bar after finished.
+        postfix_every (int): number of iterations between progress bar
+            postfix updates. Formatting the postfix fetches scalars from
+            the device, so updating it sparingly avoids synchronizing
+            every iteration. The postfix is also updated on the last
+            iteration when max_iter is reached.
 
     Attributes:
         alg (Alg)
         show_pbar (bool)
         leave_pbar (bool)
+        postfix_every (int)
 
     """
 
-    def __init__(self, alg, show_pbar=True, leave_pbar=True, record_time=True):
+    def __init__(
+        self,
+        alg,
+        show_pbar=True,
+        leave_pbar=True,
+        record_time=True,
+        postfix_every=16,
+    ):
+        if postfix_every < 1:
+            raise ValueError(
+                "postfix_every must be positive, got {}.".format(postfix_every)
+            )
+
         self.alg = alg
         self.show_pbar = show_pbar
         self.leave_pbar = leave_pbar
         self.record_time = record_time
+        self.postfix_every = postfix_every
         if self.record_time:
             self.time = [0]
 
@@ -68,6 +87,15 @@ class App(object):
     def _output(self):
         return
 
+    def _show_postfix(self):
+        """Return whether the progress bar postfix should be updated."""
+        # Only check max_iter for the last iteration, as alg.done()
+        # may itself synchronize with the device.
+        return self.show_pbar and (
+            (self.alg.iter - 1) % self.postfix_every == 0
+            or self.alg.iter >= self.alg.max_iter
+        )
+
     def run(self):
         """Run the App."""
         if self.show_pbar:
@@ -109,6 +137,8 @@ class MaxEig(App):
         A (Linop): Hermitian linear operator.
         dtype (Dtype): Data type.
         device (Device): Device.
+        postfix_every (int): Number of iterations between progress bar
+            postfix updates.
 
     Attributes:
         x (int): Eigenvector with largest eigenvalue.
@@ -126,17 +156,26 @@ class MaxEig(App):
         max_iter=30,
         show_pbar=True,
         leave_pbar=True,
+        postfix_every=16,
     ):
         self.x = util.randn(A.ishape, dtype=dtype, device=device)
         alg = PowerMethod(A, self.x, max_iter=max_iter)
-        super().__init__(alg, show_pbar=show_pbar, leave_pbar=leave_pbar)
+        super().__init__(
+            alg,
+            show_pbar=show_pbar,
+            leave_pbar=leave_pbar,
+            postfix_every=postfix_every,
+        )
 
     def _summarize(self):
-        if self.show_pbar:
-            self.pbar.set_postfix(max_eig="{0:.2E}".format(self.alg.max_eig))
+        if self._show_postfix():
+            self.pbar.set_postfix(
+                max_eig="{0:.2E}".format(float(self.alg.max_eig)),
+                refresh=False,
+            )
 
     def _output(self):
-        return self.alg.max_eig
+        return float(self.alg.max_eig)
 
 
 class LinearLeastSquares(App):
@@ -182,6 +221,8 @@ class LinearLeastSquares(App):
         max_cg_iter (int): Maximum number of iterations for conjugate gradient
             in ADMM.
         save_objective_values (bool): Toggle saving objective value.
+        postfix_every (int): Number of iterations between progress bar
+            postfix updates.
 
     """
 
@@ -209,6 +250,7 @@ class LinearLeastSquares(App):
         save_objective_values=False,
         show_pbar=True,
         leave_pbar=True,
+        postfix_every=16,
     ):
         self.A = A
         self.y = y
@@ -243,22 +285,27 @@ class LinearLeastSquares(App):
         if self.save_objective_values:
             self.objective_values = [self.objective()]
 
-        super().__init__(self.alg, show_pbar=show_pbar, leave_pbar=leave_pbar)
+        super().__init__(
+            self.alg,
+            show_pbar=show_pbar,
+            leave_pbar=leave_pbar,
+            postfix_every=postfix_every,
+        )
 
     def _summarize(self):
         if self.save_objective_values:
             self.objective_values.append(self.objective())
 
-        if self.show_pbar:
+        if self._show_postfix():
             if self.save_objective_values:
                 self.pbar.set_postfix(
-                    obj="{0:.2E}".format(self.objective_values[-1])
+                    obj="{0:.2E}".format(self.objective_values[-1]),
+                    refresh=False,
                 )
             else:
                 self.pbar.set_postfix(
-                    resid="{0:.2E}".format(
-                        backend.to_device(self.alg.resid, backend.cpu_device)
-                    )
+                    resid="{0:.2E}".format(float(self.alg.resid)),
+                    refresh=False,
                 )
 
     def _output(self):
@@ -537,6 +584,8 @@ class L2ConstrainedMinimization(App):
         y (array): Observation.
         proxg (Prox): Proximal operator of objective.
         eps (float): Residual.
+        postfix_every (int): Number of iterations between progress bar
+            postfix updates.
 
     """
 
@@ -552,6 +601,7 @@ class L2ConstrainedMinimization(App):
         tau=None,
         sigma=None,
         show_pbar=True,
+        postfix_every=16,
     ):
         self.y = y
         self.x = x
@@ -602,11 +652,13 @@ class L2ConstrainedMinimization(App):
             max_iter=max_iter,
         )
 
-        super().__init__(alg, show_pbar=show_pbar)
+        super().__init__(alg, show_pbar=show_pbar, postfix_every=postfix_every)
 
     def _summarize(self):
-        if self.show_pbar:
-            self.pbar.set_postfix(resid="{0:.2E}".format(self.alg.resid))
+        if self._show_postfix():
+            self.pbar.set_postfix(
+                resid="{0:.2E}".format(float(self.alg.resid)), refresh=False
+            )
 
     def _output(self):
         return self.x
@@ -1,9 +1,10 @@
 # -*- coding: utf-8 -*-
 """Utility functions.
 """
+import numba as nb
 import numpy as np
 
-from sigpy import backend
+from sigpy import backend, config
 
 __all__ = [
     "prod",
@@ -452,6 +453,23 @@ def axpy(y, a, x):
         x (array): Input array.
 
     """
+    xp = backend.get_array_module(y)
+    # Only fuse when y can hold a * x without casting,
+    # so that invalid casts still raise as in y += a * x.
+    a_type = a if xp == np else getattr(a, "dtype", a)
+    if (
+        _is_scalar(a)
+        and x.dtype == y.dtype
+        and np.result_type(y.dtype, a_type) == y.dtype
+    ):
+        if xp == np:
+            if _fusable(y, x):
+                _axpy_numba(y.reshape(-1), a, x.reshape(-1))
+                return
+        else:  # pragma: no cover
+            _axpy_cuda(xp.asarray(a), x, y)
+            return
+
     y += a * x
 
 
@@ -465,3 +483,464 @@ def xpay(y, a, x):
     """
     y *= a
     y += x
+
+
+def _fusable(*arrays):
+    # Fused CPU kernels operate on flat views,
+    # so all arrays must share a shape and be C-contiguous.
+    shape = arrays[0].shape
+    return all(
+        isinstance(a, np.ndarray)
+        and a.shape == shape
+        and a.flags.c_contiguous
+        for a in arrays
+    )
+
+
+def _is_scalar(a):
+    return getattr(a, "ndim", 0) == 0
+
+
+def _same_dtype(*arrays):
+    # Fused GPU kernels bind all arrays to a single type T,
+    # and raise on mismatched dtypes instead of casting.
+    return all(a.dtype == arrays[0].dtype for a in arrays)
+
+
+def _nesterov_step(x, z, gradf_x, alpha, coef):
+    """Fused accelerated gradient step.
+
+    Computes x_new = z - alpha * gradf_x and z = x_new + coef * (x_new - x),
+    and sets x = x_new, in a single pass over memory.
+
+    Args:
+        x (array): Current iterate, updated in place.
+        z (array): Extrapolated point, updated in place.
+        gradf_x (array): Gradient evaluated at z.
+        alpha (scalar): Step size.
+        coef (scalar): Extrapolation coefficient.
+
+    Returns:
+        scalar: Squared l2 norm of x_new - x.
+
+    """
+    xp = backend.get_array_module(x)
+    if xp == np:
+        if _is_scalar(alpha) and _fusable(x, z, gradf_x):
+            return _nesterov_step_numba(
+                x.reshape(-1), z.reshape(-1), gradf_x.reshape(-1), alpha, coef
+            )
+    elif _is_scalar(alpha) and _same_dtype(x, z, gradf_x):  # pragma: no cover
+        sqres = xp.empty(x.shape, dtype=x.real.dtype)
+        _nesterov_step_cuda(
+            xp.asarray(alpha, dtype=sqres.dtype),
+            xp.asarray(coef, dtype=sqres.dtype),
+            z,
+            gradf_x,
+            x,
+            z,
+            sqres,
+        )
+        return xp.sum(sqres)
+
+    x_new = z - alpha * gradf_x
+    x_diff = x_new - x
+    backend.copyto(x, x_new)
+    backend.copyto(z, x_new + coef * x_diff)
+    return xp.sum(xp.abs(x_diff) ** 2)
+
+
+def _gradient_step(x, x_old, src, gradf_x, alpha):
+    """Fused gradient step that saves the previous iterate.
+
+    Computes x_old = x and x = src - alpha * gradf_x
+    in a single pass over memory. src may be x itself.
+
+    Args:
+        x (array): Current iterate, updated in place.
+        x_old (array): Output array for the previous iterate.
+        src (array): Point the gradient step is taken from.
+        gradf_x (array): Gradient evaluated at src.
+        alpha (scalar or array): Step size.
+
+    """
+    xp = backend.get_array_module(x)
+    if xp == np:
+        if _is_scalar(alpha) and _fusable(x, x_old, src, gradf_x):
+            _gradient_step_numba(
+                x.reshape(-1),
+                x_old.reshape(-1),
+                src.reshape(-1),
+                gradf_x.reshape(-1),
+                alpha,
+            )
+            return
+    elif _same_dtype(x, x_old, src, gradf_x):  # pragma: no cover
+        _gradient_step_cuda(
+            xp.asarray(alpha, dtype=x.real.dtype), src, gradf_x, x, x_old
+        )
+        return
+
+    x_new = src - alpha * gradf_x
+    backend.copyto(x_old, x)
+    backend.copyto(x, x_new)
+
+
+def _extrapolate(z, x, x_old, coef, scale=None):
+    """Fused extrapolation, as used by Nesterov acceleration and PDHG.
+
+    Computes z = x + coef * (x - x_old) in a single pass over memory.
+
+    Args:
+        z (array): Extrapolated point, updated in place.
+        x (array): Current iterate.
+        x_old (array): Previous iterate.
+        coef (scalar): Extrapolation coefficient.
+        scale (None or array): Elementwise scaling of the squared norm.
+
+    Returns:
+        scalar: Squared l2 norm of x - x_old, divided elementwise
+            by scale if specified.
+
+    """
+    xp = backend.get_array_module(x)
+    if xp == np:
+        if scale is None and _fusable(z, x, x_old):
+            return _extrapolate_numba(
+                z.reshape(-1), x.reshape(-1), x_old.reshape(-1), coef
+            )
+        elif scale is not None and _fusable(z, x, x_old, scale):
+            return _extrapolate_scaled_numba(
+                z.reshape(-1),
+                x.reshape(-1),
+                x_old.reshape(-1),
+                coef,
+                scale.reshape(-1),
+            )
+    elif _same_dtype(z, x, x_old):  # pragma: no cover
+        sqres = xp.empty(x.shape, dtype=x.real.dtype)
+        coef = xp.asarray(coef, dtype=sqres.dtype)
+        if scale is None:
+            _extrapolate_cuda(coef, x, x_old, z, sqres)
+        else:
+            _extrapolate_scaled_cuda(coef, x, x_old, scale, z, sqres)
+
+        return xp.sum(sqres)
+
+    # Use z to hold x - x_old, to avoid temporaries.
+    xp.subtract(x, x_old, out=z)
+    if scale is None:
+        sqres = xp.real(xp.vdot(z, z))
+    else:
+        sqres = xp.sum(xp.abs(z) ** 2 / scale)
+
+    z *= coef
+    z += x
+    return sqres
+
+
+def _diff_sqnorm(x, y):
+    """Compute the squared l2 norm of x - y without forming x - y.
+
+    Args:
+        x (array): Input array.
+        y (array): Input array.
+
+    Returns:
+        scalar: Squared l2 norm of x - y.
+
+    """
+    xp = backend.get_array_module(x)
+    if xp == np:
+        if _fusable(x, y):
+            return _diff_sqnorm_numba(x.reshape(-1), y.reshape(-1))
+    elif _same_dtype(x, y):  # pragma: no cover
+        return _diff_sqnorm_cuda(
+            x, y, out=xp.empty((), dtype=x.real.dtype)
+        )
+
+    return xp.sum(xp.abs(x - y) ** 2)
+
+
+def _real_vdot(x, y):
+    """Compute the real part of <x, y>.
+
+    On GPU, contiguous arrays of a common BLAS dtype are passed straight
+    to cuBLAS dot/dotc, skipping the generic cupy.vdot dispatch.
+
+    Args:
+        x (array): Input array.
+        y (array): Input array.
+
+    Returns:
+        scalar: Real part of the inner product, on the same device as x.
+
+    """
+    xp = backend.get_array_module(x)
+    if (
+        xp != np
+        and x.dtype == y.dtype
+        and x.dtype.char in "fdFD"
+        and x.flags.c_contiguous
+        and y.flags.c_contiguous
+    ):  # pragma: no cover
+        if x.dtype.kind == "c":
+            return xp.real(cp.cublas.dotc(x.reshape(-1), y.reshape(-1)))
+        else:
+            return cp.cublas.dot(x.reshape(-1), y.reshape(-1))
+
+    return xp.real(xp.vdot(x, y))
+
+
+def _cg_step(x, r, p, Ap, alpha):
+    """Fused conjugate gradient solution and residual update.
+
+    Computes x = x + alpha * p and r = r - alpha * Ap
+    in a single pass over memory.
+
+    Args:
+        x (array): Solution, updated in place.
+        r (array): Residual, updated in place.
+        p (array): Search direction.
+        Ap (array): Linear operator applied to p.
+        alpha (scalar): Step size.
+
+    Returns:
+        scalar: Squared l2 norm of the updated residual.
+
+    """
+    xp = backend.get_array_module(x)
+    if xp == np:
+        if _is_scalar(alpha) and _fusable(x, r, p, Ap):
+            return _cg_step_numba(
+                x.reshape(-1),
+                r.reshape(-1),
+                p.reshape(-1),
+                Ap.reshape(-1),
+                alpha,
+            )
+    elif (
+        _is_scalar(alpha)
+        and x.shape == r.shape == p.shape == Ap.shape
+        and _same_dtype(x, r, p, Ap)
+        and x.flags.c_contiguous
+        and r.flags.c_contiguous
+    ):  # pragma: no cover
+        return _cg_step_cuda(
+            xp.asarray(alpha, dtype=r.real.dtype),
+            p.reshape(-1),
+            Ap.reshape(-1),
+            x.reshape(-1),
+            r.reshape(-1),
+        )
+
+    axpy(x, alpha, p)
+    axpy(r, -alpha, Ap)
+    return xp.real(xp.vdot(r, r))
+
+
+def _cg_direction(p, beta, z):
+    """Fused conjugate gradient search direction update.
+
+    Computes p = z + beta * p in a single pass over memory.
+
+    Args:
+        p (array): Search direction, updated in place.
+        beta (scalar): Conjugation coefficient.
+        z (array): Preconditioned residual.
+
+    """
+    xp = backend.get_array_module(p)
+    if xp == np:
+        if _is_scalar(beta) and _fusable(p, z):
+            _cg_direction_numba(p.reshape(-1), beta, z.reshape(-1))
+            return
+    elif _is_scalar(beta) and _same_dtype(p, z):  # pragma: no cover
+        _cg_direction_cuda(xp.asarray(beta, dtype=p.real.dtype), z, p)
+        return
+
+    xpay(p, beta, z)
+
+
+@nb.jit(nopython=True, cache=True)  # pragma: no cover
+def _nesterov_step_numba(x, z, gradf_x, alpha, coef):
+    sqres = 0.0
+    for i in range(x.size):
+        x_new = z[i] - alpha * gradf_x[i]
+        x_diff = x_new - x[i]
+        z[i] = x_new + coef * x_diff
+        x[i] = x_new
+        sqres += x_diff.real * x_diff.real + x_diff.imag * x_diff.imag
+
+    return sqres
+
+
+@nb.jit(nopython=True, cache=True)  # pragma: no cover
+def _gradient_step_numba(x, x_old, src, gradf_x, alpha):
+    for i in range(x.size):
+        x_new = src[i] - alpha * gradf_x[i]
+        x_old[i] = x[i]
+        x[i] = x_new
+
+
+@nb.jit(nopython=True, cache=True)  # pragma: no cover
+def _extrapolate_numba(z, x, x_old, coef):
+    sqres = 0.0
+    for i in range(x.size):
+        x_diff = x[i] - x_old[i]
+        z[i] = x[i] + coef * x_diff
+        sqres += x_diff.real * x_diff.real + x_diff.imag * x_diff.imag
+
+    return sqres
+
+
+@nb.jit(nopython=True, cache=True)  # pragma: no cover
+def _extrapolate_scaled_numba(z, x, x_old, coef, scale):
+    sqres = 0.0
+    for i in range(x.size):
+        x_diff = x[i] - x_old[i]
+        z[i] = x[i] + coef * x_diff
+        sqres += (
+            x_diff.real * x_diff.real + x_diff.imag * x_diff.imag
+        ) / scale[i]
+
+    return sqres
+
+
+@nb.jit(nopython=True, cache=True)  # pragma: no cover
+def _axpy_numba(y, a, x):
+    for i in range(y.size):
+        y[i] += a * x[i]
+
+
+@nb.jit(nopython=True, cache=True)  # pragma: no cover
+def _diff_sqnorm_numba(x, y):
+    sqnorm = 0.0
+    for i in range(x.size):
+        diff = x[i] - y[i]
+        sqnorm += diff.real * diff.real + diff.imag * diff.imag
+
+    return sqnorm
+
+
+@nb.jit(nopython=True, cache=True)  # pragma: no cover
+def _cg_step_numba(x, r, p, Ap, alpha):
+    sqnorm = 0.0
+    for i in range(x.size):
+        x[i] += alpha * p[i]
+        r[i] -= alpha * Ap[i]
+        sqnorm += r[i].real * r[i].real + r[i].imag * r[i].imag
+
+    return sqnorm
+
+
+@nb.jit(nopython=True, cache=True)  # pragma: no cover
+def _cg_direction_numba(p, beta, z):
+    for i in range(p.size):
+        p[i] = z[i] + beta * p[i]
+
+
+if config.cupy_enabled:  # pragma: no cover
+    import cupy as cp
+    import cupy.cublas
+
+    _axpy_cuda = cp.ElementwiseKernel(
+        "S a, T x",
+        "T y",
+        """
+        y += (T) a * x;
+        """,
+        name="axpy",
+    )
+
+    _nesterov_step_cuda = cp.ElementwiseKernel(
+        "S alpha, S coef, T z, T gradf_x",
+        "T x, T z_out, S sqres",
+        """
+        T x_new = z - (T) alpha * gradf_x;
+        T x_diff = x_new - x;
+        z_out = x_new + (T) coef * x_diff;
+        x = x_new;
+        S abs_diff = abs(x_diff);
+        sqres = abs_diff * abs_diff;
+        """,
+        name="nesterov_step",
+    )
+
+    _gradient_step_cuda = cp.ElementwiseKernel(
+        "S alpha, T src, T gradf_x",
+        "T x, T x_old",
+        """
+        T x_new = src - (T) alpha * gradf_x;
+        x_old = x;
+        x = x_new;
+        """,
+        name="gradient_step",
+    )
+
+    _extrapolate_cuda = cp.ElementwiseKernel(
+        "S coef, T x, T x_old",
+        "T z, S sqres",
+        """
+        T x_diff = x - x_old;
+        z = x + (T) coef * x_diff;
+        S abs_diff = abs(x_diff);
+        sqres = abs_diff * abs_diff;
+        """,
+        name="extrapolate",
+    )
+
+    _extrapolate_scaled_cuda = cp.ElementwiseKernel(
+        "S coef, T x, T x_old, R scale",
+        "T z, S sqres",
+        """
+        T x_diff = x - x_old;
+        z = x + (T) coef * x_diff;
+        S abs_diff = abs(x_diff);
+        sqres = abs_diff * abs_diff / (S) scale;
+        """,
+        name="extrapolate_scaled",
+    )
+
+    # Updates x and r through raw pointers while reducing |r|^2,
+    # so that no intermediate array is written.
+    # _J is the flat input index, as x and r are passed as 1D arrays.
+    _cg_step_cuda = cp.ReductionKernel(
+        "S alpha, T p, T Ap, raw T x, raw T r",
+        "S sqnorm",
+        "cg_step_map(x[_J], r[_J], p, Ap, alpha)",
+        "a + b",
+        "sqnorm = a",
+        "0",
+        "cg_step",
+        preamble="""
+        template <typename T, typename S>
+        __device__ S cg_step_map(
+            T& x, T& r, const T p, const T Ap, const S alpha
+        ) {
+            x += (T) alpha * p;
+            r -= (T) alpha * Ap;
+            S abs_r = abs(r);
+            return abs_r * abs_r;
+        }
+        """,
+    )
+
+    _cg_direction_cuda = cp.ElementwiseKernel(
+        "S beta, T z",
+        "T p",
+        """
+        p = z + (T) beta * p;
+        """,
+        name="cg_direction",
+    )
+
+    _diff_sqnorm_cuda = cp.ReductionKernel(
+        "T x, T y",
+        "S sqnorm",
+        "abs(x - y) * abs(x - y)",
+        "a + b",
+        "sqnorm = a",
+        "0",
+        "diff_sqnorm",
+    )
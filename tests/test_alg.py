@@ -1,9 +1,11 @@
+import itertools
 import unittest
 
 import numpy as np
 import numpy.testing as npt
+import scipy.sparse
 
-from sigpy import alg, linop
+from sigpy import alg, backend, config, linop
 
 if __name__ == "__main__":
     unittest.main()
@@ -34,6 +36,21 @@ class TestAlg(unittest.TestCase):
         s_sigpy = np.linalg.norm(A @ x_hat)
         npt.assert_allclose(s_numpy, s_sigpy, atol=1e-3)
 
+    def test_PowerMethod_batched(self):
+        n = 5
+        As = np.stack([np.eye(n) + 0.1 * b * np.ones([n, n]) for b in [1, 2]])
+        x_hat = np.random.random([2, n])
+        alg_method = alg.PowerMethod(
+            lambda x: np.einsum("bji,bjk,bk->bi", As, As, x),
+            x_hat,
+            batched=True,
+        )
+        while not alg_method.done():
+            alg_method.update()
+
+        s_numpy = np.linalg.svd(As, compute_uv=False)[:, 0] ** 2
+        npt.assert_allclose(alg_method.max_eig, s_numpy, rtol=1e-3)
+
     def test_GradientMethod(self):
         n = 5
         lamda = 0.1
@@ -45,45 +62,165 @@ class TestAlg(unittest.TestCase):
         )[0]
         alpha = 1.0 / lipschitz
 
-        for accelerate in [True, False]:
-            for proxg in [None, lambda alpha, x: x / (1 + lamda * alpha)]:
-                with self.subTest(accelerate=accelerate, proxg=proxg):
-                    x_sigpy = np.zeros([n])
-
-                    def gradf(x):
-                        gradf_x = A.T @ (A @ x - y)
-                        if proxg is None:
-                            gradf_x += lamda * x
+        for accelerate, proxg, block_size in itertools.product(
+            [True, False],
+            [None, lambda alpha, x: x / (1 + lamda * alpha)],
+            [None, 2],
+        ):
+            if proxg is None and block_size is not None:
+                continue
+
+            with self.subTest(
+                accelerate=accelerate, proxg=proxg, block_size=block_size
+            ):
+                x_sigpy = np.zeros([n])
+
+                def gradf(x):
+                    gradf_x = A.T @ (A @ x - y)
+                    if proxg is None:
+                        gradf_x += lamda * x
+
+                    return gradf_x
+
+                alg_method = alg.GradientMethod(
+                    gradf,
+                    x_sigpy,
+                    alpha,
+                    accelerate=accelerate,
+                    proxg=proxg,
+                    max_iter=1000,
+                    block_size=block_size,
+                )
 
-                        return gradf_x
+                while not alg_method.done():
+                    alg_method.update()
 
-                    alg_method = alg.GradientMethod(
-                        gradf,
-                        x_sigpy,
-                        alpha,
-                        accelerate=accelerate,
-                        proxg=proxg,
-                        max_iter=1000,
-                    )
+                npt.assert_allclose(x_sigpy, x_numpy)
 
-                    while not alg_method.done():
-                        alg_method.update()
+    def test_ConjugateGradient(self):
+        n = 5
+        lamda = 0.1
+        A, x_numpy, y = self.Ax_y_setup(n, lamda)
+        for x0_is_zero in [None, True, False]:
+            with self.subTest(x0_is_zero=x0_is_zero):
+                x = np.zeros([n])
+                alg_method = alg.ConjugateGradient(
+                    lambda x: A.T @ A @ x + lamda * x,
+                    A.T @ y,
+                    x,
+                    max_iter=1000,
+                    x0_is_zero=x0_is_zero,
+                )
+                while not alg_method.done():
+                    alg_method.update()
 
-                    npt.assert_allclose(x_sigpy, x_numpy)
+                npt.assert_allclose(x, x_numpy)
 
-    def test_ConjugateGradient(self):
+    def test_ConjugateGradient_check_every(self):
         n = 5
         lamda = 0.1
         A, x_numpy, y = self.Ax_y_setup(n, lamda)
         x = np.zeros([n])
         alg_method = alg.ConjugateGradient(
-            lambda x: A.T @ A @ x + lamda * x, A.T @ y, x, max_iter=1000
+            lambda x: A.T @ A @ x + lamda * x,
+            A.T @ y,
+            x,
+            max_iter=1000,
+            tol=1e-8,
+            check_every=4,
         )
         while not alg_method.done():
             alg_method.update()
 
+        self.assertEqual(alg_method.iter % 4, 0)
         npt.assert_allclose(x, x_numpy)
 
+    def test_ConjugateGradient_matvec_dtype(self):
+        n = 5
+        lamda = 0.1
+        A, x_numpy, y = self.Ax_y_setup(n, lamda)
+        AHA = A.T @ A + lamda * np.eye(n)
+        # A function must compute in matvec_dtype itself,
+        # while a sparse matrix is cast by ConjugateGradient.
+        for op in [AHA.astype(np.float32).dot, scipy.sparse.csr_matrix(AHA)]:
+            with self.subTest(op=type(op)):
+                x = np.zeros([n])
+                alg_method = alg.ConjugateGradient(
+                    op,
+                    A.T @ y,
+                    x,
+                    max_iter=1000,
+                    tol=1e-6,
+                    matvec_dtype=np.float32,
+                )
+                while not alg_method.done():
+                    alg_method.update()
+
+                npt.assert_allclose(x, x_numpy, rtol=1e-4)
+
+        # Sparse matrices do not support float16.
+        with self.assertRaises(ValueError):
+            alg.ConjugateGradient(
+                scipy.sparse.csr_matrix(AHA.astype(np.float32)),
+                (A.T @ y).astype(np.float32),
+                np.zeros([n], dtype=np.float32),
+                matvec_dtype=np.float16,
+            )
+
+        # A function can still compute in float16.
+        x = np.zeros([n], dtype=np.float32)
+        alg_method = alg.ConjugateGradient(
+            AHA.astype(np.float16).dot,
+            (A.T @ y).astype(np.float32),
+            x,
+            max_iter=1000,
+            tol=1e-3,
+            matvec_dtype=np.float16,
+        )
+        while not alg_method.done():
+            alg_method.update()
+
+        npt.assert_allclose(x, x_numpy, atol=1e-2, rtol=1e-2)
+
+    def test_ConjugateGradient_sparse(self):
+        n = 5
+        lamda = 0.1
+        A, x_numpy, y = self.Ax_y_setup(n, lamda)
+        AHA = scipy.sparse.csr_matrix(A.T @ A + lamda * np.eye(n))
+        for P in [None, "jacobi"]:
+            with self.subTest(P=P):
+                x = np.zeros([n])
+                alg_method = alg.ConjugateGradient(
+                    AHA, A.T @ y, x, P=P, max_iter=1000
+                )
+                while not alg_method.done():
+                    alg_method.update()
+
+                npt.assert_allclose(x, x_numpy)
+
+    def test_ConjugateGradient_run_batch(self):
+        n = 5
+        lamdas = [0.1, 1]
+        devices = [backend.cpu_device]
+        if config.cupy_enabled:
+            devices.append(backend.Device(0))
+
+        for device in devices:
+            with self.subTest(device=device):
+                As, bs, xs, x_numpys = [], [], [], []
+                for lamda in lamdas:
+                    A, x_numpy, y = self.Ax_y_setup(n, lamda)
+                    AHA = A.T @ A + lamda * np.eye(n)
+                    AHA = backend.to_device(AHA, device)
+                    As.append(lambda x, AHA=AHA: AHA @ x)
+                    bs.append(backend.to_device(A.T @ y, device))
+                    xs.append(device.xp.zeros([n]))
+                    x_numpys.append(x_numpy)
+
+                alg.ConjugateGradient.run_batch(As, bs, xs, max_iter=1000)
+                for x, x_numpy in zip(xs, x_numpys):
+                    npt.assert_allclose(backend.to_device(x), x_numpy)
+
     def test_PrimalDualHybridGradient(self):
         n = 5
         lamda = 0.1
@@ -112,6 +249,49 @@ class TestAlg(unittest.TestCase):
 
         npt.assert_allclose(x, x_numpy)
 
+    def test_PrimalDualHybridGradient_batched(self):
+        n = 5
+        lamda = 0.1
+        A, x_numpy, y = self.Ax_y_setup(n, lamda)
+        ys = np.stack([y, 2 * y, -y])
+        lipschitz = np.linalg.svd(np.matmul(A.T, A), compute_uv=False)[0]
+
+        x = np.zeros([3, n])
+        u = np.zeros([3, n])
+        alg_method = alg.PrimalDualHybridGradient(
+            lambda alpha, u: (u - alpha * ys) / (1 + alpha),
+            lambda alpha, x: x / (1 + lamda * alpha),
+            lambda x: x @ A.T,
+            lambda x: x @ A,
+            x,
+            u,
+            np.full([3, 1], 1.0 / lipschitz),
+            1.0,
+            max_iter=1000,
+            batch_axis=0,
+        )
+        while not alg_method.done():
+            alg_method.update()
+
+        npt.assert_allclose(x, np.stack([x_numpy, 2 * x_numpy, -x_numpy]))
+
+        funcs = [None] * 4
+        with self.assertRaises(ValueError):
+            alg.PrimalDualHybridGradient(
+                *funcs, x, np.zeros([2, n]), 1.0, 1.0, batch_axis=0
+            )
+
+        with self.assertRaises(ValueError):
+            alg.PrimalDualHybridGradient(
+                *funcs, x, u, np.ones([2, 1]), 1.0, batch_axis=0
+            )
+
+        # tau must broadcast to x, not just be compatible with it.
+        with self.assertRaises(ValueError):
+            alg.PrimalDualHybridGradient(
+                *funcs, x, u, np.ones([2, 1, 1]), 1.0, batch_axis=0
+            )
+
     def test_AugmentedLagrangianMethod(self):
         n = 5
         lamda = 0.1
@@ -181,6 +361,19 @@ class TestAlg(unittest.TestCase):
 
                 npt.assert_allclose(x, x_numpy)
 
+        def grad_hess(x):
+            return gradf(x), inv_hessf(x)
+
+        x = np.zeros(n)
+        alg_method = alg.NewtonsMethod(None, None, x, grad_hess=grad_hess)
+        while not alg_method.done():
+            alg_method.update()
+
+        npt.assert_allclose(x, x_numpy)
+
+        with self.assertRaises(TypeError):
+            alg.NewtonsMethod(None, None, x)
+
     def test_GerchbergSaxton(self):
         n = 10
         lamda = 0.1
@@ -1,4 +1,5 @@
 import unittest
+from unittest import mock
 
 import numpy as np
 import numpy.testing as npt
@@ -22,6 +23,18 @@ class TestApp(unittest.TestCase):
             atol=1e-3,
         )
 
+    def test_postfix_every(self):
+        n = 5
+        A = linop.MatMul([n, 1], util.randn([n, n]))
+        with mock.patch("sigpy.app.tqdm") as tqdm:
+            app.MaxEig(A.H * A, max_iter=20, postfix_every=16).run()
+
+        # Postfix is set on iterations 1, 17 and the last one.
+        self.assertEqual(tqdm.return_value.set_postfix.call_count, 3)
+
+        with self.assertRaises(ValueError):
+            app.MaxEig(A.H * A, postfix_every=0)
+
     def test_LinearLeastSquares(self):
         n = 5
         _A = np.eye(n) + 0.1 * np.ones([n, n])
@@ -4,7 +4,7 @@ import unittest
 import numpy as np
 import numpy.testing as npt
 
-from sigpy import backend, util
+from sigpy import backend, config, util
 
 if __name__ == "__main__":
     unittest.main()
@@ -129,3 +129,163 @@ class TestUtil(unittest.TestCase):
         npt.assert_allclose(
             sigma**2, util.monte_carlo_sure(f, y, sigma), atol=1e-3
         )
+
+    def test_nesterov_step(self):
+        for dtype in [np.float32, np.complex64]:
+            with self.subTest(dtype=dtype):
+                x = util.randn([4, 5], dtype=dtype)
+                z = util.randn([4, 5], dtype=dtype)
+                g = util.randn([4, 5], dtype=dtype)
+                alpha, coef = 0.5, 0.3
+
+                x_new = z - alpha * g
+                z_new = x_new + coef * (x_new - x)
+                sqres = np.linalg.norm(x_new - x) ** 2
+
+                output = util._nesterov_step(x, z, g, alpha, coef)
+                npt.assert_allclose(x, x_new, atol=1e-5, rtol=1e-5)
+                npt.assert_allclose(z, z_new, atol=1e-5, rtol=1e-5)
+                npt.assert_allclose(output, sqres, atol=1e-5, rtol=1e-5)
+
+    def test_cg_step(self):
+        for dtype in [np.float32, np.complex64]:
+            with self.subTest(dtype=dtype):
+                x = util.randn([4, 5], dtype=dtype)
+                r = util.randn([4, 5], dtype=dtype)
+                p = util.randn([4, 5], dtype=dtype)
+                Ap = util.randn([4, 5], dtype=dtype)
+                alpha = 0.5
+
+                x_new = x + alpha * p
+                r_new = r - alpha * Ap
+
+                output = util._cg_step(x, r, p, Ap, alpha)
+                npt.assert_allclose(x, x_new, atol=1e-5, rtol=1e-5)
+                npt.assert_allclose(r, r_new, atol=1e-5, rtol=1e-5)
+                npt.assert_allclose(
+                    output, np.linalg.norm(r_new) ** 2, atol=1e-5, rtol=1e-5
+                )
+
+                beta = 0.3
+                p_new = r + beta * p
+                util._cg_direction(p, beta, r)
+                npt.assert_allclose(p, p_new, atol=1e-5, rtol=1e-5)
+
+    def test_diff_sqnorm(self):
+        x = util.randn([4, 5], dtype=np.complex64)
+        y = util.randn([4, 5], dtype=np.complex64)
+        npt.assert_allclose(
+            util._diff_sqnorm(x, y), np.linalg.norm(x - y) ** 2, rtol=1e-5
+        )
+        npt.assert_allclose(
+            util._diff_sqnorm(x.T, y.T), np.linalg.norm(x - y) ** 2, rtol=1e-5
+        )
+
+    def test_extrapolate(self):
+        for scale in [None, np.full([4, 5], 2, dtype=np.float32)]:
+            with self.subTest(scale=scale):
+                x = util.randn([4, 5], dtype=np.complex64)
+                x_old = util.randn([4, 5], dtype=np.complex64)
+                z = np.empty_like(x)
+                sqres = np.abs(x - x_old) ** 2
+                if scale is not None:
+                    sqres /= scale
+
+                npt.assert_allclose(
+                    util._extrapolate(z, x, x_old, 0.5, scale=scale),
+                    np.sum(sqres),
+                    rtol=1e-5,
+                )
+                npt.assert_allclose(
+                    z, x + 0.5 * (x - x_old), atol=1e-5, rtol=1e-5
+                )
+
+    def test_axpy(self):
+        x = util.randn([4, 5], dtype=np.complex64)
+        for a in [0.5, 2j, np.arange(5)]:
+            with self.subTest(a=a):
+                y = util.randn([4, 5], dtype=np.complex64)
+                y_new = y + a * x
+                util.axpy(y, a, x)
+                npt.assert_allclose(y, y_new, atol=1e-5, rtol=1e-5)
+
+        # Casts that y += a * x rejects must still raise.
+        with self.assertRaises(TypeError):
+            util.axpy(np.ones(5, dtype=int), 0.5, np.arange(5))
+
+    def test_gradient_step(self):
+        x = util.randn([4, 5])
+        x_init = x.copy()
+        x_old = np.empty_like(x)
+        g = util.randn([4, 5])
+        alpha = 0.5
+
+        util._gradient_step(x, x_old, x, g, alpha)
+        npt.assert_allclose(x_old, x_init)
+        npt.assert_allclose(x, x_init - alpha * g)
+
+    def test_fused_mixed_dtypes(self):
+        # Higher precision inputs must be cast, as in the unfused updates.
+        devices = [backend.cpu_device]
+        if config.cupy_enabled:
+            devices.append(backend.Device(0))
+
+        for device in devices:
+            xp = device.xp
+            with device, self.subTest(device=device):
+                x = util.randn([4, 5], dtype=np.complex64, device=device)
+                z = util.randn([4, 5], dtype=np.complex64, device=device)
+                g = util.randn([4, 5], dtype=np.complex128, device=device)
+                x_new = z - 0.5 * g
+                util._nesterov_step(x, z, g, 0.5, 0.3)
+                npt.assert_allclose(
+                    backend.to_device(x),
+                    backend.to_device(x_new),
+                    atol=1e-5,
+                    rtol=1e-5,
+                )
+
+                r = util.randn([4, 5], dtype=np.complex64, device=device)
+                p = util.randn([4, 5], dtype=np.complex64, device=device)
+                r_new = r - 0.5 * g
+                util._cg_step(x, r, p, g, 0.5)
+                npt.assert_allclose(
+                    backend.to_device(r),
+                    backend.to_device(r_new),
+                    atol=1e-5,
+                    rtol=1e-5,
+                )
+
+                p_new = g + 0.5 * p
+                util._cg_direction(p, 0.5, g)
+                npt.assert_allclose(
+                    backend.to_device(p),
+                    backend.to_device(p_new),
+                    atol=1e-5,
+                    rtol=1e-5,
+                )
+
+                x_old = xp.empty_like(x)
+                x_init = x.copy()
+                util._gradient_step(x, x_old, x, g, 0.5)
+                npt.assert_allclose(
+                    backend.to_device(x),
+                    backend.to_device(x_init - 0.5 * g),
+                    atol=1e-5,
+                    rtol=1e-5,
+                )
+
+                z_new = x + 0.5 * (x - g)
+                util._extrapolate(z, x, g, 0.5)
+                npt.assert_allclose(
+                    backend.to_device(z),
+                    backend.to_device(z_new),
+                    atol=1e-5,
+                    rtol=1e-5,
+                )
+
+                npt.assert_allclose(
+                    backend.to_device(util._diff_sqnorm(x, g)),
+                    np.linalg.norm(backend.to_device(x - g)) ** 2,
+                    rtol=1e-5,
+                )